@@ -21,16 +21,23 @@ directory; otherwise, each PPTX is saved in the same directory as its source.
 from __future__ import annotations
 
 import argparse
+import atexit
+import hashlib
+import io
 import logging
 import os
+import queue
+import re
 import subprocess
 import sys
 import tempfile
+import threading
 import zipfile
 import shutil
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Tuple
 
 try:
     from pptx import Presentation
@@ -40,16 +47,32 @@ except ImportError as exc:
 
 _log = logging.getLogger(__name__)
 
+# Import CairoSVG once at module load: the first import triggers the
+# Cairo/Pango fontconfig scan (hundreds of ms cold), so pay it once per
+# process rather than on every page conversion.
+try:
+    import cairosvg  # type: ignore
+    _HAS_CAIROSVG = True
+except ImportError:
+    cairosvg = None  # type: ignore
+    _HAS_CAIROSVG = False
+
+# Pillow is optional; when present, rendered PNGs are re-encoded at a low
+# compression level before embedding (see _render_page_bytes).
+try:
+    from PIL import Image as _PILImage  # type: ignore
+    _HAS_PIL = True
+except ImportError:
+    _HAS_PIL = False
+
 def convert_svg_to_png(svg_path: Path, png_path: Path) -> None:
     """Convert an SVG file to a PNG file using CairoSVG or ImageMagick."""
-    try:
-        import cairosvg  # type: ignore
-        cairosvg.svg2png(url=str(svg_path), write_to=str(png_path))
-        return
-    except ImportError:
-        pass
-    except Exception as exc:
-        _log.warning("cairosvg failed: %s", exc)
+    if _HAS_CAIROSVG:
+        try:
+            cairosvg.svg2png(url=str(svg_path), write_to=str(png_path))
+            return
+        except Exception as exc:
+            _log.warning("cairosvg failed: %s", exc)
     magick_path = shutil.which("magick")
     if magick_path:
         try:
@@ -66,31 +89,143 @@ def convert_svg_to_png(svg_path: Path, png_path: Path) -> None:
         "Unable to convert SVG to PNG. Install cairosvg or ensure ImageMagick is configured."
     )
 
+# Scratch directory for the ImageMagick fallback, created on first use and
+# removed once at interpreter exit.  A per-notebook TemporaryDirectory would
+# cost an mkdtemp plus one unlink syscall per page for every notebook in a
+# batch run.
+_SHARED_TMP: Optional[Path] = None
+
+def _shared_tmpdir() -> Path:
+    global _SHARED_TMP
+    if _SHARED_TMP is None:
+        _SHARED_TMP = Path(tempfile.mkdtemp(prefix="nb2ppt_"))
+        atexit.register(shutil.rmtree, _SHARED_TMP, ignore_errors=True)
+    return _SHARED_TMP
+
+def convert_svgs_to_pngs_batch(svg_paths: List[Path], out_dir: Path) -> None:
+    """Convert many SVG files to PNG with a single ImageMagick invocation.
+
+    A lone ``magick mogrify`` call amortizes process startup, font-cache and
+    delegate initialization across the whole batch instead of paying them
+    once per page.
+    """
+    if not svg_paths:
+        return
+    magick_path = shutil.which("magick")
+    if not magick_path:
+        raise RuntimeError(
+            "Unable to convert SVG to PNG. Install cairosvg or ensure ImageMagick is configured."
+        )
+    try:
+        subprocess.run(
+            [
+                magick_path,
+                "mogrify",
+                "-path",
+                str(out_dir),
+                "-format",
+                "png",
+                *map(str, svg_paths),
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError(
+            f"ImageMagick batch conversion failed: {exc.stderr.decode()}"
+        ) from exc
+
+# EMUs (the unit python-pptx uses for slide geometry) per inch, and the
+# raster density to target: pages get stretched to slide size anyway, so
+# rendering beyond ~150 DPI only burns CPU and bloats the output file.
+_EMU_PER_INCH = 914400
+_RASTER_DPI = 150
+
+def _render_page_bytes(
+    svg_bytes: bytes,
+    output_width: Optional[int] = None,
+    output_height: Optional[int] = None,
+) -> bytes:
+    """Rasterize one SVG page entirely in memory and return the PNG bytes.
+
+    Defined at module level so it can be pickled into ProcessPoolExecutor
+    workers; each worker pays the CairoSVG import (and its Pango font-map
+    setup) once when the module loads, not per page.
+    """
+    png_bytes = cairosvg.svg2png(
+        bytestring=svg_bytes, output_width=output_width, output_height=output_height
+    )
+    if not _HAS_PIL:
+        return png_bytes
+    # cairosvg emits PNG at zlib's default level 6.  These bytes only ever
+    # land inside a pptx, so a fast level-1 re-encode trades a few percent
+    # of size for a large cut in per-page deflate CPU.
+    out = io.BytesIO()
+    _PILImage.open(io.BytesIO(png_bytes)).save(out, "PNG", compress_level=1)
+    return out.getvalue()
+
+_PAGE_SUFFIXES = (".svg", ".png", ".jpg", ".jpeg")
+
+_DIGITS_RE = re.compile(r"\d+")
+
 def extract_page_files(zf: zipfile.ZipFile) -> List[str]:
-    """Return a list of page asset file names in the notebook archive."""
-    candidates: List[str] = []
+    """Return a list of page asset file names in the notebook archive.
+
+    Notebook archives can contain thousands of entries, so the basename and
+    sort key for each candidate are computed exactly once (decorate-sort-
+    undecorate) rather than re-derived inside the sort comparator.
+    """
+    entries: List[Tuple[int, str]] = []
     for name in zf.namelist():
-        base = os.path.basename(name).lower()
-        if base.startswith("page") and (
-            base.endswith(".svg")
-            or base.endswith(".png")
-            or base.endswith(".jpg")
-            or base.endswith(".jpeg")
-        ):
-            candidates.append(name)
-    def page_key(name: str) -> int:
-        digits = "".join(ch for ch in os.path.basename(name) if ch.isdigit())
-        return int(digits) if digits else 0
-    return sorted(candidates, key=page_key)
-
-def process_notebook(notebook_path: Path, output_dir: Path) -> Path:
-    """Convert a single .notebook file into a .pptx in the specified output directory."""
+        base = name.rsplit("/", 1)[-1].lower()
+        if not base.startswith("page") or not base.endswith(_PAGE_SUFFIXES):
+            continue
+        match = _DIGITS_RE.search(base)
+        entries.append((int(match.group()) if match else 0, name))
+    entries.sort()
+    return [name for _, name in entries]
+
+def _safe_process(task: Tuple[Path, Path, bool]) -> Optional[str]:
+    """Convert one notebook inside a pool worker; returns an error message on failure.
+
+    Defined at module level so it can be pickled into ProcessPoolExecutor
+    workers.
+    """
+    notebook_path, output_dir, parallel_pages = task
+    try:
+        process_notebook(notebook_path, output_dir, parallel_pages=parallel_pages)
+    except Exception as exc:
+        return str(exc)
+    return None
+
+def process_notebook(
+    notebook_path: Path, output_dir: Path, parallel_pages: bool = True
+) -> Path:
+    """Convert a single .notebook file into a .pptx in the specified output directory.
+
+    With ``parallel_pages`` disabled, SVG pages are rasterized serially in
+    this process—useful when the caller already parallelizes across
+    notebooks and a nested pool would oversubscribe the machine.
+    """
     if not notebook_path.exists():
         raise FileNotFoundError(notebook_path)
     output_dir.mkdir(parents=True, exist_ok=True)
     base_name = notebook_path.stem
     pptx_path = output_dir / f"{base_name}.pptx"
     _log.info("Processing %s", notebook_path)
+    # Ask the kernel to start reading the archive ahead of us; on slow media
+    # (network shares, SD cards) this overlaps the per-page reads below with
+    # the transfer instead of paying full latency per entry.  Best-effort:
+    # the call does not exist on Windows and may fail on exotic filesystems.
+    try:
+        fd = os.open(notebook_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except (AttributeError, OSError):
+        pass
     with zipfile.ZipFile(notebook_path) as zf:
         page_files = extract_page_files(zf)
         if not page_files:
@@ -98,28 +233,147 @@ def process_notebook(notebook_path: Path, output_dir: Path) -> Path:
             return pptx_path
         prs = Presentation()
         blank_layout = prs.slide_layouts[6]
-        with tempfile.TemporaryDirectory() as tmpdir_name:
-            tmpdir = Path(tmpdir_name)
-            for idx, page_name in enumerate(page_files, start=1):
-                suffix = Path(page_name).suffix.lower()
-                extracted_path = tmpdir / f"page_{idx}{suffix}"
-                with extracted_path.open("wb") as f_out:
-                    f_out.write(zf.read(page_name))
-                if suffix == ".svg":
-                    png_path = tmpdir / f"page_{idx}.png"
+        # Rasterize at the slide's own size; SVG-intrinsic resolution can be
+        # far larger than anything the deck will ever display.
+        target_w_px = int(prs.slide_width / _EMU_PER_INCH * _RASTER_DPI)
+        target_h_px = int(prs.slide_height / _EMU_PER_INCH * _RASTER_DPI)
+
+        def add_slide(image: object) -> None:
+            # Accepts whatever add_picture accepts: a file-like object or a
+            # path string.  python-pptx copies the image bytes immediately,
+            # so callers may discard the source afterwards.
+            slide = prs.slides.add_slide(blank_layout)
+            slide.shapes.add_picture(
+                image, 0, 0, width=prs.slide_width, height=prs.slide_height
+            )
+
+        if _HAS_CAIROSVG and parallel_pages:
+            # Three overlapping stages: a producer thread pulls pages out of
+            # the archive and hands SVGs to the render pool, pool workers
+            # rasterize, and the main thread consumes rendered pages in
+            # order and builds slides.  The bounded queue keeps only a few
+            # pages in flight, so total time approaches max(stage) instead
+            # of their sum without unbounded memory growth.
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+                work_q: queue.Queue = queue.Queue(maxsize=(os.cpu_count() or 1) * 2)
+
+                # SMART decks routinely repeat pages (backgrounds, blank
+                # templates); while a page's render is still in flight the
+                # future is cached by digest so queued repeats share it.
+                # The consumer drops each entry as it is built into a slide,
+                # so rendered bytes accumulate only for the queue window,
+                # not the whole deck.  A repeat that shows up again after
+                # that pays a re-render, but python-pptx collapses identical
+                # image bytes into one pptx part, so output size is
+                # unaffected either way.
+                rendered: dict = {}
+
+                # If the producer dies (corrupt archive entry, broken pool),
+                # the exception lands here and is re-raised once the queue is
+                # drained; the finally block guarantees the sentinel so the
+                # consumer below can never block forever on work_q.get().
+                producer_error: List[Exception] = []
+
+                def produce() -> None:
                     try:
-                        convert_svg_to_png(extracted_path, png_path)
+                        for page_name in page_files:
+                            data = zf.read(page_name)
+                            if Path(page_name).suffix.lower() == ".svg":
+                                digest = hashlib.sha1(data).digest()
+                                future = rendered.get(digest)
+                                if future is None:
+                                    future = ex.submit(
+                                        _render_page_bytes, data, target_w_px, target_h_px
+                                    )
+                                    rendered[digest] = future
+                                work_q.put((page_name, digest, future))
+                            else:
+                                work_q.put((page_name, None, io.BytesIO(data)))
                     except Exception as exc:
-                        _log.error("Failed to convert %s: %s", page_name, exc)
-                        continue
-                    image_path = png_path
+                        producer_error.append(exc)
+                    finally:
+                        work_q.put(None)
+
+                producer = threading.Thread(target=produce, daemon=True)
+                producer.start()
+                while True:
+                    item = work_q.get()
+                    if item is None:
+                        break
+                    page_name, digest, payload = item
+                    if digest is not None:
+                        # Release the cache entry; repeats already sitting in
+                        # the queue keep their own reference to the future.
+                        rendered.pop(digest, None)
+                    if not isinstance(payload, io.BytesIO):
+                        try:
+                            payload = io.BytesIO(payload.result())
+                        except Exception as exc:
+                            _log.error("Failed to convert %s: %s", page_name, exc)
+                            continue
+                    add_slide(payload)
+                producer.join()
+                if producer_error:
+                    raise producer_error[0]
+        elif _HAS_CAIROSVG:
+            # Serial in-memory path for workers that are already one job in
+            # a file-level pool.  Only the previous page's render is kept, so
+            # each worker holds at most one PNG at a time: runs of a repeated
+            # page (blank templates, shared backgrounds) still render once,
+            # a repeat after an intervening page re-renders, and python-pptx
+            # collapses identical image bytes in the output either way.
+            last_digest: Optional[bytes] = None
+            last_png: Optional[bytes] = None
+            for page_name in page_files:
+                data = zf.read(page_name)
+                if Path(page_name).suffix.lower() == ".svg":
+                    digest = hashlib.sha1(data).digest()
+                    if digest != last_digest:
+                        try:
+                            png_bytes = _render_page_bytes(data, target_w_px, target_h_px)
+                        except Exception as exc:
+                            _log.error("Failed to convert %s: %s", page_name, exc)
+                            last_digest = None
+                            last_png = None
+                            continue
+                        last_digest = digest
+                        last_png = png_bytes
+                    add_slide(io.BytesIO(last_png))
+                else:
+                    add_slide(io.BytesIO(data))
+        else:
+            # The ImageMagick CLI needs real files, so keep the tempdir
+            # round-trip for this fallback only.  The scratch dir is shared
+            # across all notebooks in the process and cleaned up once at
+            # exit; the notebook stem keeps file names collision-free.
+            tmpdir = _shared_tmpdir()
+            images: List[Optional[str]] = [None] * len(page_files)
+            svg_paths: List[Path] = []
+            for idx, page_name in enumerate(page_files):
+                suffix = Path(page_name).suffix.lower()
+                extracted_path = tmpdir / f"{base_name}_{idx + 1}{suffix}"
+                # Stream the entry through a bounded buffer rather than
+                # materializing the whole asset as a bytes object first.
+                with zf.open(page_name) as src, extracted_path.open("wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                if suffix == ".svg":
+                    svg_paths.append(extracted_path)
+                    images[idx] = str(extracted_path.with_suffix(".png"))
                 else:
-                    image_path = extracted_path
-                slide = prs.slides.add_slide(blank_layout)
-                slide.shapes.add_picture(
-                    str(image_path), 0, 0, width=prs.slide_width, height=prs.slide_height
-                )
-            prs.save(pptx_path)
+                    images[idx] = str(extracted_path)
+            if svg_paths:
+                # One batch ImageMagick call beats N process launches.
+                try:
+                    convert_svgs_to_pngs_batch(svg_paths, tmpdir)
+                except Exception as exc:
+                    _log.error("Failed to convert SVG pages: %s", exc)
+                    for idx, page_name in enumerate(page_files):
+                        if Path(page_name).suffix.lower() == ".svg":
+                            images[idx] = None
+            for image in images:
+                if image is not None:
+                    add_slide(image)
+        prs.save(pptx_path)
     _log.info("Saved PowerPoint to %s", pptx_path)
     return pptx_path
 
@@ -150,20 +404,39 @@ def main(argv: List[str] | None = None) -> int:
         help="Optional directory where all converted .pptx files will be written. "
              "If omitted, each file is saved in the same directory as its source.",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of notebooks to convert in parallel. With --jobs greater "
+             "than 1, pages within each notebook are rendered serially so the "
+             "machine is not oversubscribed; use the default for one big deck, "
+             "a higher value for directories of many small ones.",
+    )
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging.")
     args = parser.parse_args(argv)
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
-    any_processed = False
-    for notebook_file in iter_notebook_files(args.input):
-        any_processed = True
-        dest_dir: Path = args.output_dir if args.output_dir else notebook_file.parent
-        try:
-            process_notebook(notebook_file, dest_dir)
-        except Exception as exc:
-            _log.error("Error processing %s: %s", notebook_file, exc)
-    if not any_processed:
+    files = list(iter_notebook_files(args.input))
+    if not files:
         _log.error("No .notebook files found in %s", args.input)
         return 1
+    def dest_dir_for(notebook_file: Path) -> Path:
+        return args.output_dir if args.output_dir else notebook_file.parent
+    if args.jobs > 1 and len(files) > 1:
+        # Whole-notebook conversions are independent, so the batch case gets
+        # file-level parallelism.
+        tasks = [(f, dest_dir_for(f), False) for f in files]
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(files))) as ex:
+            for notebook_file, error in zip(files, ex.map(_safe_process, tasks)):
+                if error:
+                    _log.error("Error processing %s: %s", notebook_file, error)
+    else:
+        for notebook_file in files:
+            try:
+                process_notebook(notebook_file, dest_dir_for(notebook_file))
+            except Exception as exc:
+                _log.error("Error processing %s: %s", notebook_file, exc)
     return 0
 
 if __name__ == "__main__":